@@ -5,6 +5,8 @@
 # - Writes CRLF line endings in binary (Outlook/Google/Apple friendly)
 # - Skips writing if the API returns 0 fixtures or if 0 events are built (keeps last good file)
 # - Tracks changes and writes notify.txt (optional Telegram step in workflow can send it)
+# - Conditional GETs (ETag/Last-Modified kept in state); 304 on both feeds = nothing to do
+# - Skips the rebuild entirely if both raw feeds (and this script) match the last good build
 
 import json
 import os
@@ -12,18 +14,33 @@ import re
 import sys
 import time
 import hashlib
+import functools
+import filecmp
+import gzip
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+from urllib.error import HTTPError
+
+try:  # optional C-accelerated JSON; the stdlib json fallback produces identical bytes
+    import orjson
+except ImportError:
+    orjson = None
 
 # --- CONFIG -------------------------------------------------------------------
 FIXTURES_URL = "https://faapi.jwhsolutions.co.uk/api/Fixtures/938310682?teamName=Poole%20Town%20FC%20Wessex%20U18%20Colts"
 RESULTS_URL  = "https://faapi.jwhsolutions.co.uk/api/Results/938310682?teamName=Poole%20Town%20FC%20Wessex%20U18%20Colts"
 
 TEAM_NAME = "Poole Town FC Wessex U18 Colts"
+TEAM_NAME_LC = TEAM_NAME.lower()  # home/away detection, computed once
 OUTPUT    = "poole_town_u18_colts_fixtures.ics"
-STATE     = ".state_poole_u18.json"  # stores per-UID seq + fingerprint + snapshot
+OUTPUT_TMP = OUTPUT + ".tmp"         # events are streamed here, then renamed over OUTPUT
+STATE     = ".state_poole_u18.json"  # per-UID seq, snapshot, DTSTAMP + render digest
+# Reserved state keys start with "__" (UIDs never do)
+HTTP_CACHE_KEY = "__http_cache__"      # per-URL ETag/Last-Modified/body sha256 + script sha256
+PAYLOAD_HASH_KEY = "__payload_hash__"  # raw feeds + script hash of the last good build
 NOTIFY_FILE = "notify.txt"           # human-readable change log (optional Telegram)
 
 # Handy links (TinyURL versions, shortened labels)
@@ -37,64 +54,144 @@ LINKS = [
 # Fixed event duration (KO + HT + buffer)
 EVENT_DURATION = timedelta(hours=2)
 
+# One VEVENT, CRLF-terminated; filled per fixture with str.format
+EVENT_TMPL = (
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{stamp}\r\n"
+    "DTSTART:{start}\r\n"
+    "DTEND:{end}\r\n"
+    "SEQUENCE:{seq}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "LOCATION:{location}\r\n"
+    "DESCRIPTION:{description}\r\n"
+    "END:VEVENT\r\n"
+)
+
+# FullTime publishes kick-off times in UK local time
+LONDON = ZoneInfo("Europe/London")
+
 # --- UTILITIES ----------------------------------------------------------------
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_FC_RE   = re.compile(r"\b(fc|afc)\b")
+_WS_RE   = re.compile(r"\s+")
+_ICS_ESC = str.maketrans({"\\": "\\\\", ",": "\\,", ";": "\\;", "\n": "\\n"})  # for esc()
+
 def log(*a): print(*a, flush=True)
 
 def crlf_join(lines):  # ICS requires CRLF line endings
     return "\r\n".join(lines) + "\r\n"
 
+def json_loads(data):
+    """Decode JSON from str/bytes, via orjson when available."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 def esc(s: str) -> str:
-    """Escape ICS special chars and newlines in text fields."""
-    return (s or "").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+    """Escape ICS special chars and newlines in text fields (one translate pass)."""
+    return (s or "").translate(_ICS_ESC)
+
+# LINKS are constant, so escape and join them once for every DESCRIPTION
+LINKS_DESC = "\\n".join(esc(x) for x in LINKS)
+
+def calendar_header() -> str:
+    """VCALENDAR preamble (CRLF-terminated); depends only on config constants."""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//PooleTown//U18 Fixtures via FullTimeAPI//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+    ]
+    # Calendar-level X-properties (RFC-safe names)
+    for link in LINKS:
+        label, url = link.split(":", 1)
+        safe_name = label.strip().upper().replace(" ", "-").replace("/", "-")
+        lines.append(f"X-{safe_name}:{url.strip()}")
+    return crlf_join(lines)
 
+CAL_HEADER = calendar_header()  # built once at import, written at the top of every ICS
+
+@functools.lru_cache(maxsize=256)
 def slug(s: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "-", (s or "").lower()).strip("-")
+    return _SLUG_RE.sub("-", (s or "").lower()).strip("-")
 
+@functools.lru_cache(maxsize=256)
 def clean_team(s: str) -> str:
     """Light normalisation to reduce matching issues."""
     s = (s or "").lower()
-    s = re.sub(r"\b(fc|afc)\b", "", s)
+    s = _FC_RE.sub("", s)
     s = s.replace("u18s", "u18")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 def fmt_local(dt_utc: datetime) -> str:
     """Pretty Europe/London time for notifications."""
-    return dt_utc.astimezone(ZoneInfo("Europe/London")).strftime("%a %d %b %Y %H:%M")
+    return dt_utc.astimezone(LONDON).strftime("%a %d %b %Y %H:%M")
 
 def tg_escape(s: str) -> str:
     """Minimal HTML escaping for Telegram (if you enable the step)."""
     return (s or "").replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
 
-def fetch_json(url: str, timeout=15, retries=3, backoff=2.0):
-    """GET JSON with small retry/backoff; robust to list-or-dict shapes."""
+NOT_MODIFIED = object()  # fetch_json() result for an HTTP 304
+
+def fetch_json(url: str, timeout=15, retries=3, backoff=2.0, cache=None):
+    """GET JSON with small retry/backoff; robust to list-or-dict shapes.
+
+    `cache` is this URL's dict from state[HTTP_CACHE_KEY]. Validators saved there by the
+    last good fetch make the GET conditional, and a 304 returns NOT_MODIFIED. The dict
+    is refilled (validators + body sha256) from a successful response and left empty on
+    failure.
+    """
+    validators = dict(cache or {})
+    if cache is not None:
+        cache.clear()
+    headers = {
+        "User-Agent": "PooleTownCalendar/1.0 (+github.com/JustGeary/Poole-Town-Calendar)",
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip",  # JSON compresses well; urllib won't decode it for us
+    }
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
     last_err = None
     for attempt in range(1, retries + 1):
         try:
-            req = Request(
-                url,
-                headers={
-                    "User-Agent": "PooleTownCalendar/1.0 (+github.com/JustGeary/Poole-Town-Calendar)",
-                    "Accept": "application/json",
-                },
-            )
+            req = Request(url, headers=headers)
             with urlopen(req, timeout=timeout) as r:
                 raw = r.read()
+                gzipped = (r.headers.get("Content-Encoding") or "").lower() == "gzip"
+                if gzipped:
+                    raw = gzip.decompress(raw)
                 text = raw.decode("utf-8", "ignore")
                 status = getattr(r, "status", 200)
-                log(f"[DEBUG] GET {url} -> {status} ({len(text)} bytes)")
-        except (HTTPError, URLError) as e:
+                etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+                log(f"[DEBUG] GET {url} -> {status} ({len(text)} bytes{', gzip' if gzipped else ''})")
+        # OSError covers HTTPError/URLError plus read timeouts and bad gzip; EOFError/zlib.error = truncated gzip
+        except (OSError, EOFError, zlib.error) as e:
+            if isinstance(e, HTTPError) and e.code == 304:
+                log(f"[DEBUG] GET {url} -> 304 (not modified)")
+                cache.update(validators)
+                return NOT_MODIFIED
             last_err = e
             log(f"[WARN] attempt {attempt}/{retries} failed: {e}")
             time.sleep(backoff ** (attempt - 1))
             continue
 
         try:
-            data = json.loads(text)
+            data = json_loads(text)
         except Exception as e:
             log(f"[WARN] JSON decode failed: {e}. First 200 chars:\n{text[:200]}")
             return []
 
+        if cache is not None:
+            cache["sha256"] = hashlib.sha256(raw).hexdigest()
+            if etag:
+                cache["etag"] = etag
+            if last_modified:
+                cache["last_modified"] = last_modified
+
         if isinstance(data, list):
             return data
         if isinstance(data, dict):
@@ -114,180 +211,262 @@ def fetch_json(url: str, timeout=15, retries=3, backoff=2.0):
     return []
 
 # --- DATE/TIME ----------------------------------------------------------------
+# strptime's own field patterns for '%d/%m/%y|%Y' + optional '%H:%M' (any whitespace between),
+# so exactly the strings the old strptime formats took are accepted
+_UK_DT_RE = re.compile(
+    r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])/(1[0-2]|0[1-9]|[1-9])/(\d\d\d\d|\d\d)"
+    r"(?:\s+(2[0-3]|[01]\d|\d):([0-5]\d|\d))?"
+)
+
+@functools.lru_cache(maxsize=1024)
+def _parse_uk_local(s: str):
+    """Hand-parse 'dd/MM/yy[yy]' with optional ' HH:mm' into (naive local datetime, has_time).
+
+    Accepts exactly what the old strptime formats did (including the %y pivot: 69-99 are
+    19xx) without probing them one by one. Raises ValueError for anything else.
+    """
+    m = _UK_DT_RE.fullmatch(s)
+    if not m:
+        raise ValueError(f"bad date '{s}'")
+    d, mo, y, hh, mm = m.groups()
+    year = int(y)
+    if len(y) == 2:
+        year += 1900 if year >= 69 else 2000
+    if hh is not None:
+        return datetime(year, int(mo), int(d), int(hh), int(mm)), True
+    return datetime(year, int(mo), int(d)), False
+
+@functools.lru_cache(maxsize=1024)
 def parse_fixture_dt_local_to_utc(local_dt_str: str) -> datetime:
     """Convert FullTime 'fixtureDateTime' like '07/09/25 14:00' or 'dd/MM/YYYY HH:mm' to UTC."""
     if not local_dt_str:
         raise ValueError("fixtureDateTime missing")
-    for fmt in ("%d/%m/%y %H:%M", "%d/%m/%Y %H:%M"):
-        try:
-            dt_local = datetime.strptime(local_dt_str, fmt)
-            return dt_local.replace(tzinfo=ZoneInfo("Europe/London")).astimezone(timezone.utc)
-        except Exception:
-            pass
-    raise ValueError(f"Could not parse fixtureDateTime '{local_dt_str}'")
-
-def key_from_date_and_teams(date_str: str, home: str, away: str) -> str:
-    """Canonical match key (date-only + teams)."""
-    for fmt in ("%d/%m/%y %H:%M", "%d/%m/%Y %H:%M", "%d/%m/%y", "%d/%m/%Y"):
-        try:
-            d = datetime.strptime(date_str, fmt)
-            return f"{d.strftime('%Y%m%d')}|{clean_team(home)}|{clean_team(away)}"
-        except Exception:
-            pass
-    return f"{date_str}|{clean_team(home)}|{clean_team(away)}"
+    try:
+        dt_local, has_time = _parse_uk_local(local_dt_str)
+    except ValueError:
+        has_time = False
+    if not has_time:
+        raise ValueError(f"Could not parse fixtureDateTime '{local_dt_str}'")
+    return dt_local.replace(tzinfo=LONDON).astimezone(timezone.utc)
+
+def key_from_date_and_teams(date_str: str, home: str, away: str) -> tuple:
+    """Canonical match key: (yyyymmdd int, clean home, clean away); raw date as str if unparseable."""
+    try:
+        d, _ = _parse_uk_local(date_str)
+        day = d.year * 10000 + d.month * 100 + d.day
+    except Exception:  # odd feed values (non-str, unhashable, malformed) must not kill the run
+        day = str(date_str)
+    return (day, clean_team(home), clean_team(away))
 
 # --- STATE --------------------------------------------------------------------
+_NO_ENTRY = {}  # read-only stand-in for a UID with no state yet (never mutate)
+
 def load_state():
     if os.path.exists(STATE):
-        with open(STATE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(STATE, "rb") as f:
+            raw = f.read()
+        return json_loads(raw)
     return {}
 
 def save_state(s):
-    with open(STATE, "w", encoding="utf-8") as f:
-        json.dump(s, f, indent=2, sort_keys=True)
+    # Same indented, key-sorted layout either way so the committed file diffs cleanly
+    if orjson is not None:
+        data = orjson.dumps(s, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(s, indent=2, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    # Write-then-rename so a killed run can never leave a truncated state file
+    tmp = STATE + ".tmp"
+    with open(tmp, "wb", buffering=65536) as f:
+        f.write(data)
+    os.replace(tmp, STATE)
 
 # --- UID & SEQUENCE -----------------------------------------------------------
-def make_uid(start_utc: datetime, home: str, away: str) -> str:
-    us_home = TEAM_NAME.lower() in (home or "").lower()
-    opponent = (away if us_home else home) or "opponent"
+def make_uid(start_utc: datetime, opponent: str, us_home: bool) -> str:
+    opponent = opponent or "opponent"
     ts = start_utc.strftime("%Y%m%dT%H%M%SZ")
     hoa = "h" if us_home else "a"
     return f"ptfc-u18-{ts}-{hoa}-{slug(opponent)}@poole-town"
 
 # --- MAIN BUILD ---------------------------------------------------------------
 def main():
-    fixtures = fetch_json(FIXTURES_URL)
-    results  = fetch_json(RESULTS_URL)
+    # Hash of this script: a code change must rebuild even when the feeds are unchanged
+    with open(__file__, "rb") as f:
+        script_sha = hashlib.sha256(f.read()).hexdigest()
+
+    state = load_state()
+    # Validators are only trusted for the script that built the published ICS; with no ICS
+    # or a different script, drop them so both feeds are fetched in full
+    if not os.path.exists(OUTPUT) or state.get(HTTP_CACHE_KEY, {}).get("script_sha256") != script_sha:
+        state.pop(HTTP_CACHE_KEY, None)
+    http_cache = state.setdefault(HTTP_CACHE_KEY, {"script_sha256": script_sha})
+
+    # Both feeds are independent, so fetch them concurrently (wall time ≈ slowest GET)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fx_job  = pool.submit(fetch_json, FIXTURES_URL, cache=http_cache.setdefault(FIXTURES_URL, {}))
+        res_job = pool.submit(fetch_json, RESULTS_URL, cache=http_cache.setdefault(RESULTS_URL, {}))
+        fixtures, results = fx_job.result(), res_job.result()
+
+    # Both 304: nothing changed since the last good build
+    if fixtures is NOT_MODIFIED and results is NOT_MODIFIED:
+        log("[INFO] Fixtures and results not modified; leaving existing ICS untouched.")
+        return
+    # Only one changed: response bodies aren't kept, so refetch the other one in full
+    if fixtures is NOT_MODIFIED:
+        http_cache[FIXTURES_URL] = {}
+        fixtures = fetch_json(FIXTURES_URL, cache=http_cache[FIXTURES_URL])
+    if results is NOT_MODIFIED:
+        http_cache[RESULTS_URL] = {}
+        results = fetch_json(RESULTS_URL, cache=http_cache[RESULTS_URL])
     log(f"[INFO] Fixtures: {len(fixtures)} | Results: {len(results)}")
 
+    # Same raw feeds and same script as the last good build => identical output, stop here
+    payload_hash = None
+    fx_sha, res_sha = http_cache[FIXTURES_URL].get("sha256"), http_cache[RESULTS_URL].get("sha256")
+    if fx_sha and res_sha:
+        payload_hash = hashlib.sha256(f"{fx_sha}|{res_sha}|{script_sha}".encode()).hexdigest()
+        if payload_hash == state.get(PAYLOAD_HASH_KEY) and os.path.exists(OUTPUT):
+            save_state(state)  # keep any refreshed validators
+            log("[INFO] API payload unchanged since last build; leaving existing ICS untouched.")
+            return
+
     # 🔒 SAFETY: if the API returns nothing, do not touch the ICS/state
     if len(fixtures) == 0:
         log("[WARN] No fixtures returned; leaving existing ICS untouched.")
         return
 
-    # Build result lookup
+    # Build result lookup: match key -> (home score, away score), normalised once here.
+    # Results without both scores are left out, so a miss is simply "no result yet".
     res_map = {}
     for r in results:
+        hs       = r.get("homeScore") or r.get("homeGoals")
+        as_      = r.get("awayScore") or r.get("awayGoals")
+        if hs is None or as_ is None:
+            continue
         date_str = r.get("resultDateTime") or r.get("fixtureDateTime") or r.get("date") or ""
         home     = r.get("homeTeam") or r.get("home") or ""
         away     = r.get("awayTeam") or r.get("away") or ""
-        hs       = r.get("homeScore") or r.get("homeGoals")
-        as_      = r.get("awayScore") or r.get("awayGoals")
-        res_map[key_from_date_and_teams(date_str, home, away)] = {"hs": hs, "as": as_}
+        res_map[key_from_date_and_teams(date_str, home, away)] = (str(hs).strip(), str(as_).strip())
 
-    # Safe sort (won’t crash if one row has odd date)
-    def safe_key(fx):
+    # Parse each kick-off once, sort on it and reuse it below (decorate-sort-undecorate).
+    # Safe sort (won’t crash if one row has odd date): unparseable rows get None and go last.
+    decorated = []
+    for fx in fixtures:
         try:
-            return parse_fixture_dt_local_to_utc(fx.get("fixtureDateTime") or fx.get("date") or "")
+            start = parse_fixture_dt_local_to_utc(fx.get("fixtureDateTime") or fx.get("date") or "")
         except Exception:
-            return datetime.max.replace(tzinfo=timezone.utc)
-    fixtures.sort(key=safe_key)
+            start = None
+        decorated.append((start, fx))
+    never = datetime.max.replace(tzinfo=timezone.utc)
+    decorated.sort(key=lambda t: t[0] or never)
 
-    state = load_state()
-    prev_uids = set(state.keys())
+    prev_uids = {k for k in state if not k.startswith("__")}
     seen_uids = set()
     added, updated, removed = [], [], []
 
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//PooleTown//U18 Fixtures via FullTimeAPI//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-    ]
-    # Calendar-level X-properties (RFC-safe names)
-    for link in LINKS:
-        label, url = link.split(":", 1)
-        safe_name = label.strip().upper().replace(" ", "-").replace("/", "-")
-        lines.append(f"X-{safe_name}:{url.strip()}")
-
-    built = 0
-    for fx in fixtures:
-        try:
-            f_date_local = fx.get("fixtureDateTime") or fx.get("date") or ""
-            home = (fx.get("homeTeam") or "").strip()
-            away = (fx.get("awayTeam") or "").strip()
-            venue = (fx.get("location") or fx.get("ground") or "").strip()
-            comp  = (fx.get("competition") or "").strip()
-
-            start_utc = parse_fixture_dt_local_to_utc(f_date_local)
-            end_utc   = start_utc + EVENT_DURATION
-            uid       = make_uid(start_utc, home, away)
-            seen_uids.add(uid)
-
-            us_home   = TEAM_NAME.lower() in home.lower()
-            opponent  = away if us_home else home
-
-            # Result merge
-            r = res_map.get(key_from_date_and_teams(f_date_local, home, away))
-            hs = str(r["hs"]).strip() if r and r.get("hs") is not None else None
-            as_ = str(r["as"]).strip() if r and r.get("as") is not None else None
-
-            if hs is not None and as_ is not None:
-                summary = f"{TEAM_NAME} {hs}–{as_} {opponent}" if us_home else f"{opponent} {hs}–{as_} {TEAM_NAME}"
-            else:
-                summary = f"{TEAM_NAME} vs {opponent}" if us_home else f"{opponent} vs {TEAM_NAME}"
-
-            desc_bits = [f"{home} vs {away}"]
-            if comp:  desc_bits.append(f"Competition: {comp}")
-            if venue: desc_bits.append(f"Venue: {venue}")
-            if hs is not None and as_ is not None:
-                desc_bits.append(f"Result: {home} {hs}–{as_} {away}")
-            desc_bits.extend(LINKS)
-            description = "\\n".join(esc(x) for x in desc_bits)
-
-            # Change detection snapshot
-            snapshot = {
-                "ko": start_utc.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "home": home, "away": away,
-                "venue": venue, "comp": comp,
-                "hs": hs, "as": as_,
-            }
-            prev = state.get(uid, {}).get("snapshot")
-
-            if prev is None:
-                added.append(f"• {fmt_local(start_utc)} — {home} vs {away} ({venue})")
-            else:
-                deltas = []
-                if prev.get("ko") != snapshot["ko"]:
-                    deltas.append("time")
-                if prev.get("venue") != venue:
-                    deltas.append("venue")
-                if prev.get("comp") != comp:
-                    deltas.append("competition")
-                if (prev.get("hs"), prev.get("as")) != (hs, as_):
-                    if hs is not None and as_ is not None:
-                        deltas.append(f"score {home} {hs}–{as_} {away}")
-                    else:
-                        deltas.append("score cleared")
-                if deltas:
-                    updated.append(f"• {fmt_local(start_utc)} — {home} vs {away} ({', '.join(deltas)})")
-
-            # SEQUENCE bump if fixture+result composite changed
-            fingerprint = hashlib.sha256(json.dumps({"fx": fx, "res": r}, sort_keys=True, default=str).encode()).hexdigest()
-            seq = state.get(uid, {}).get("seq", 0)
-            if state.get(uid, {}).get("fp") not in (None, fingerprint):
-                seq += 1
-            state[uid] = {"seq": seq, "fp": fingerprint, "snapshot": snapshot}
-
-            now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-            lines.extend([
-                "BEGIN:VEVENT",
-                f"UID:{uid}",
-                f"DTSTAMP:{now}",
-                f"DTSTART:{start_utc.strftime('%Y%m%dT%H%M%SZ')}",
-                f"DTEND:{end_utc.strftime('%Y%m%dT%H%M%SZ')}",
-                f"SEQUENCE:{seq}",
-                f"SUMMARY:{esc(summary)}",
-                f"LOCATION:{esc(venue)}",
-                f"DESCRIPTION:{description}",
-                "END:VEVENT",
-            ])
-            built += 1
-        except Exception as e:
-            log(f"[WARN] Skipping fixture due to error: {e}")
-            log("[WARN] Offending item was:\n" + json.dumps(fx, indent=2, ensure_ascii=False))
+    # Build time: DTSTAMP for new/changed events (byte-identical events keep their stored stamp)
+    now = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    # Stream header + each event straight to a temp file (64 KiB buffered writes);
+    # it only replaces OUTPUT once we know at least one event was built.
+    with open(OUTPUT_TMP, "w", encoding="utf-8", newline="", buffering=65536) as out:
+        out.write(CAL_HEADER)
+
+        built = 0
+        for start_utc, fx in decorated:
+            try:
+                f_date_local = fx.get("fixtureDateTime") or fx.get("date") or ""
+                home = (fx.get("homeTeam") or "").strip()
+                away = (fx.get("awayTeam") or "").strip()
+                venue = (fx.get("location") or fx.get("ground") or "").strip()
+                comp  = (fx.get("competition") or "").strip()
+
+                if start_utc is None:  # re-raise the parse error so it's logged and skipped below
+                    start_utc = parse_fixture_dt_local_to_utc(f_date_local)
+                end_utc   = start_utc + EVENT_DURATION
+                us_home   = TEAM_NAME_LC in home.lower()
+                opponent  = away if us_home else home
+                uid       = make_uid(start_utc, opponent, us_home)
+                seen_uids.add(uid)
+
+                # Result merge
+                score = res_map.get(key_from_date_and_teams(f_date_local, home, away))
+                hs, as_ = score or (None, None)
+                has_score = score is not None
+
+                if has_score:
+                    summary = f"{TEAM_NAME} {hs}–{as_} {opponent}" if us_home else f"{opponent} {hs}–{as_} {TEAM_NAME}"
+                else:
+                    summary = f"{TEAM_NAME} vs {opponent}" if us_home else f"{opponent} vs {TEAM_NAME}"
+
+                desc_bits = [f"{home} vs {away}"]
+                if comp:  desc_bits.append(f"Competition: {comp}")
+                if venue: desc_bits.append(f"Venue: {venue}")
+                if has_score:
+                    desc_bits.append(f"Result: {home} {hs}–{as_} {away}")
+                description = "\\n".join(esc(x) for x in desc_bits)
+                if LINKS_DESC:
+                    description += "\\n" + LINKS_DESC
+
+                # Change detection snapshot
+                snapshot = {
+                    "ko": start_utc.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "home": home, "away": away,
+                    "venue": venue, "comp": comp,
+                    "hs": hs, "as": as_,
+                }
+                entry = state.get(uid) or _NO_ENTRY
+                prev = entry.get("snapshot")
+
+                if prev is None:
+                    added.append(f"• {fmt_local(start_utc)} — {home} vs {away} ({venue})")
+                else:
+                    deltas = []
+                    if prev.get("ko") != snapshot["ko"]:
+                        deltas.append("time")
+                    if prev.get("venue") != venue:
+                        deltas.append("venue")
+                    if prev.get("comp") != comp:
+                        deltas.append("competition")
+                    if (prev.get("hs"), prev.get("as")) != (hs, as_):
+                        if has_score:
+                            deltas.append(f"score {home} {hs}–{as_} {away}")
+                        else:
+                            deltas.append("score cleared")
+                    if deltas:
+                        updated.append(f"• {fmt_local(start_utc)} — {home} vs {away} ({', '.join(deltas)})")
+
+                # SEQUENCE bump if the fixture's feed data (kick-off, teams, venue, competition,
+                # score) changed; plain rendering changes only restamp (see below)
+                seq = entry.get("seq", 0)
+                if prev is not None and prev != snapshot:
+                    seq += 1
+                # Render once with an empty DTSTAMP; the digest of that is the only "did the output
+                # change" check, so DTSTAMP stays stable while the VEVENT is byte-identical and any
+                # rendering change (data or code) restamps
+                vevent = EVENT_TMPL.format(
+                    uid=uid,
+                    stamp="",
+                    start=start_utc.strftime("%Y%m%dT%H%M%SZ"),
+                    end=end_utc.strftime("%Y%m%dT%H%M%SZ"),
+                    seq=seq,
+                    summary=esc(summary),
+                    location=esc(venue),
+                    description=description,
+                )
+                rendered = hashlib.blake2b(vevent.encode(), digest_size=8).hexdigest()
+                stamp = (entry.get("stamp") if entry.get("rendered") == rendered else None) or now
+                state[uid] = {
+                    "seq": seq, "snapshot": snapshot, "stamp": stamp, "rendered": rendered,
+                }
+
+                # Only BEGIN/UID precede DTSTAMP, so the first match is the template's own line
+                out.write(vevent.replace("DTSTAMP:\r\n", f"DTSTAMP:{stamp}\r\n", 1))
+                built += 1
+            except Exception as e:
+                log(f"[WARN] Skipping fixture due to error: {e}")
+                log("[WARN] Offending item was:\n" + json.dumps(fx, indent=2, ensure_ascii=False))
+
+        out.write("END:VCALENDAR\r\n")
 
     # Removed fixtures (were in state, not seen now)
     for uid in sorted(prev_uids - seen_uids):
@@ -300,15 +479,19 @@ def main():
 
     # ⛔ Nothing to write? Keep previous file.
     if built == 0:
+        os.remove(OUTPUT_TMP)
         log("[WARN] Built 0 events; leaving existing ICS untouched.")
         return
 
-    # Write ICS
-    lines.append("END:VCALENDAR")
-    with open(OUTPUT, "wb") as f:
-        f.write(crlf_join(lines).encode("utf-8"))
+    # Publish ICS, unless it is byte-identical to the current file (keeps mtime/caches intact)
+    if os.path.exists(OUTPUT) and filecmp.cmp(OUTPUT_TMP, OUTPUT, shallow=False):
+        os.remove(OUTPUT_TMP)
+        log(f"[INFO] {OUTPUT} unchanged ({built} events); skipping write.")
+    else:
+        os.replace(OUTPUT_TMP, OUTPUT)
+        log(f"[INFO] Wrote {OUTPUT} with {built} events.")
+    state[PAYLOAD_HASH_KEY] = payload_hash
     save_state(state)
-    log(f"[INFO] Wrote {OUTPUT} with {built} events.")
 
     # Write notify.txt if there are changes
     notify_sections = []